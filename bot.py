@@ -1,9 +1,14 @@
 import asyncio
+from collections import deque
+import copy
 from dotenv import load_dotenv
-import json
+from functools import lru_cache
+import logging
+import orjson
 import os
 import requests
 import time
+from typing import Final
 
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
 from telegram.ext import ApplicationBuilder, CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes, filters
@@ -12,11 +17,43 @@ from requests.exceptions import RequestException
 VIRUS_TOTAL_URL = "https://www.virustotal.com/api/v3/files"
 DATA_FILE = "data/reviewers.json"
 VIRUS_TOTAL_REPORT_URL = "https://www.virustotal.com/api/v3/analyses/{0}" 
+VIRUS_TOTAL_TIMEOUT = (10, 60) # (connect, read) seconds, so a hung request can't hold a worker thread
 EXPECTED_MIME_TYPE = "application/pdf"
+logger = logging.getLogger(__name__)
+
+GROUP_ID = None # Loaded from .env at startup
+FLUSH_DELAY = 1 # Seconds to coalesce state changes before writing them to disk
+FLUSH_MAX_DELAY = 60 # Upper bound for the retry backoff when writes keep failing
+
+START_MSG: Final[str] = (
+    "👋 ¡Hola! Soy el bot de Hackiit.\n\n"
+    "Si te gustaría ser parte del grupo, envíame tu *writeup en formato PDF* para poder revisarlo. En caso de ser aceptado, te añadiré al grupo. \n\n"
+    "Para acceder a la plataforma de retos de iniciación, regístrate en: https://retos.hackiit.org\n\n"
+)
+HELP_MSG: Final[str] = (
+    "Comandos disponibles:\n"
+    "/start - iniciar\n"
+    "/userinfo - ver tu información de usuario\n"
+    "/help - ayuda\n"
+    "/unblock <user_id> - desbloquear usuario (solo revisores)\n"
+    "/add_reviewer <user_id> - añadir revisor (solo revisores)\n"
+    "/remove_reviewer <user_id> - eliminar revisor (solo revisores)"
+)
+
+# In-memory bot state, loaded once and persisted lazily by the flusher
+_STATE = None
+_dirty = asyncio.Event()
+_flush_lock = asyncio.Lock() # Serializes writes, they share the same temp file
+_reviewer_set = frozenset() # Reviewer IDs for O(1) permission checks, mirrors data["reviewers"]
 
 
 # ---------- Utility functions ----------
 
+# Uploads a file's content to Virus Total (blocking, meant to run in a worker thread).
+def upload_to_virus_total(content, file_name, headers):
+    files = { "file": (file_name, content, EXPECTED_MIME_TYPE) }
+    return requests.post(VIRUS_TOTAL_URL, headers=headers, files=files, timeout=VIRUS_TOTAL_TIMEOUT)
+
 # Upload and check file with Virus Total
 async def check_virus_total(document, telegram_file):
     # 1. Configure Headers and verify API Key
@@ -30,30 +67,26 @@ async def check_virus_total(document, telegram_file):
         "x-apikey": vt_api_key,
     }
 
-    file_path = f"/tmp/{document.file_name}"
-
     # 2. Download the file and upload it to VirusTotal
     print('VT LOG: Iniciando análisis de VirusTotal.')
     try:
-        # Download the file to /tmp
-        await telegram_file.download_to_drive(file_path)
+        # Download the file into memory: each submission scans its own bytes
+        content = bytes(await telegram_file.download_as_bytearray())
 
-        with open(file_path, 'rb') as file_data:
-            files = { "file": (document.file_name, file_data, EXPECTED_MIME_TYPE) }
-            print('VT LOG: Subiendo fichero a VirusTotal...')
+        print('VT LOG: Subiendo fichero a VirusTotal...')
 
-            # Upload
-            response = requests.post(VIRUS_TOTAL_URL, headers=headers, files=files)
+        # Upload (off the event loop, so other users aren't stalled)
+        response = await asyncio.to_thread(upload_to_virus_total, content, document.file_name or "writeup.pdf", headers)
 
-            # Check the status code (It has to be 200 or 201)
-            if response.status_code not in [200, 201]:
-                print(f'❌ ERROR VT: Fallo en la subida. Código HTTP: {response.status_code}')
-                print('❌ ERROR VT: Respuesta del servidor:', response.text)
-                return False
+        # Check the status code (It has to be 200 or 201)
+        if response.status_code not in [200, 201]:
+            print(f'❌ ERROR VT: Fallo en la subida. Código HTTP: {response.status_code}')
+            print('❌ ERROR VT: Respuesta del servidor:', response.text)
+            return False
 
-            response_data = response.json()['data']
-            print('VT LOG: Fichero enviado. ID de Análisis:', response_data.get('id'))
-            analysis_url = response_data['links']['self']
+        response_data = response.json()['data']
+        print('VT LOG: Fichero enviado. ID de Análisis:', response_data.get('id'))
+        analysis_url = response_data['links']['self']
 
     except RequestException as e:
         print(f"❌ ERROR VT: Fallo en la petición HTTP durante la subida: {e}")
@@ -61,19 +94,15 @@ async def check_virus_total(document, telegram_file):
     except Exception as e:
         print(f"❌ ERROR VT: Error inesperado en la subida o descarga: {e}")
         return False
-    finally:
-        # 3. Remove the temporary file
-        if os.path.exists(file_path):
-            os.remove(file_path)
 
-    # 4. Wait for the analysis to complete
+    # 3. Wait for the analysis to complete
     for i in range(10): # Max of 10 attempts (100 seconds)
         await asyncio.sleep(10)
         print(f'VT LOG: Comprobando análisis... Intento {i+1}/10')
 
         try:
             # Get the report
-            report_response = requests.get(analysis_url, headers=headers)
+            report_response = await asyncio.to_thread(requests.get, analysis_url, headers=headers, timeout=VIRUS_TOTAL_TIMEOUT)
 
             if report_response.status_code != 200:
                 print(f'❌ ERROR VT: Fallo al obtener el informe. Código HTTP: {report_response.status_code}')
@@ -111,48 +140,131 @@ async def check_virus_total(document, telegram_file):
 def load_data():
     if not os.path.exists(DATA_FILE) or os.path.getsize(DATA_FILE) == 0:
         # Initializing with 'user_assignments'
-        return {"reviewers": [], "pending": {}, "blocked": [], "next_index": 0, "user_assignments": {}} 
+        return {"reviewers": deque(), "pending": {}, "blocked": set(), "user_assignments": {}} 
 
     try:
-        with open(DATA_FILE, "r") as f:
-            data = json.load(f)
+        with open(DATA_FILE, "rb") as f:
+            data = orjson.loads(f.read())
             # Ensure 'user_assignments' exists when loading
             if "user_assignments" not in data:
                 data["user_assignments"] = {}
+            # Keep the blocked users as a set in memory for O(1) lookups
+            data["blocked"] = set(data.get("blocked", []))
+            # JSON object keys are strings: key pending writeups by int user id
+            data["pending"] = {int(k): v for k, v in data.get("pending", {}).items()}
+            # Reviewers rotate in a deque: the head is the next one to be assigned.
+            # Older files stored the rotation as 'next_index', apply it once.
+            data["reviewers"] = deque(data.get("reviewers", []))
+            data["reviewers"].rotate(-data.pop("next_index", 0))
             return data
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         print("⚠️ Advertencia: Archivo de datos vacío o corrupto. Inicializando.")
         # Initializing with 'user_assignments'
-        return {"reviewers": [], "pending": {}, "blocked": [], "next_index": 0, "user_assignments": {}}
+        return {"reviewers": deque(), "pending": {}, "blocked": set(), "user_assignments": {}}
 
-# Saves the current data to the JSON file.
+# Saves the current data to the JSON file atomically (write to a temp file, then rename).
 def save_data(data):
-    os.makedirs("data", exist_ok=True)
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    # Sets and deques aren't JSON serializable: store them as lists
+    data = {**data, "reviewers": list(data["reviewers"]), "blocked": sorted(data["blocked"])}
+    payload = orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+
+    tmp_file = DATA_FILE + ".tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+    except OSError:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    # A crash before this point leaves the previous file untouched
+    os.replace(tmp_file, DATA_FILE)
+
+# Returns the cached bot state, loading it from disk on first use.
+def get_state():
+    global _STATE
+    if _STATE is None:
+        _STATE = load_data()
+        refresh_reviewer_set(_STATE)
+    return _STATE
+
+# Rebuilds the reviewer ID set. Must be called whenever the reviewers change.
+def refresh_reviewer_set(data):
+    global _reviewer_set
+    _reviewer_set = frozenset(data["reviewers"])
+
+# Checks if a user is a reviewer.
+def is_reviewer(user_id):
+    return user_id in _reviewer_set
+
+# Marks the cached state as modified so the flusher persists it.
+def mark_dirty():
+    _dirty.set()
+
+# Writes the cached state to disk (off the event loop) if it has pending changes.
+async def flush_state():
+    async with _flush_lock:
+        if not _dirty.is_set() or _STATE is None:
+            return
+        _dirty.clear()
+        # Snapshot in the event loop so handlers can't mutate it mid-write
+        snapshot = copy.deepcopy(_STATE)
+        save = asyncio.ensure_future(asyncio.to_thread(save_data, snapshot))
+        try:
+            await asyncio.shield(save)
+        except asyncio.CancelledError:
+            # The thread can't be cancelled: keep the lock until the write ends
+            try:
+                await save
+            except Exception:
+                _dirty.set()
+            raise
+        except Exception:
+            _dirty.set() # Retry the write on the next flush
+            raise
+
+# Background task: waits for changes and persists them in a single write.
+async def flusher():
+    failures = 0
+    while True:
+        await _dirty.wait()
+        # Back off exponentially while writes keep failing
+        await asyncio.sleep(min(FLUSH_DELAY * 2 ** failures, FLUSH_MAX_DELAY))
+        try:
+            await flush_state()
+        except Exception as e:
+            if failures == 0:
+                logger.exception("Error al guardar el estado, se reintentará")
+            else:
+                logger.warning("Error al guardar el estado (intento %s): %s", failures + 1, e)
+            failures += 1
+        else:
+            if failures:
+                logger.info("Estado guardado tras %s intentos fallidos", failures)
+            failures = 0
 
 # Gets the ID of the next reviewer using a round-robin rotation system (only for initial assignment).
 def get_next_reviewer_round_robin(data):
-    reviewers = data.get("reviewers", [])
+    reviewers = data["reviewers"]
     if not reviewers:
         return None
 
-    reviewer = reviewers[data["next_index"] % len(reviewers)]
-    data["next_index"] = (data["next_index"] + 1) % len(reviewers)
-    save_data(data)
+    reviewer = reviewers[0]
+    reviewers.rotate(-1)
+    mark_dirty()
     return reviewer
 
 # Gets the user's fixed reviewer or assigns a new one.
 def get_user_reviewer(user_id, data):
     user_id_str = str(user_id)
     assignments = data.get("user_assignments", {})
-    reviewers_list = data.get("reviewers", [])
 
     # 1. Check if the user already has an assigned reviewer and if they are still active
     if user_id_str in assignments:
         reviewer_id = assignments[user_id_str]
 
-        if reviewer_id in reviewers_list:
+        if is_reviewer(reviewer_id):
             return reviewer_id # Return the existing fixed reviewer
         else:
             print(f"⚠️ Revisor {reviewer_id} asignado a usuario {user_id} ya no es revisor. Reasignando...")
@@ -164,25 +276,27 @@ def get_user_reviewer(user_id, data):
     if new_reviewer_id is not None:
         # Save the new assignment
         data["user_assignments"][user_id_str] = new_reviewer_id
-        save_data(data)
+        mark_dirty()
         return new_reviewer_id
 
     return None # No reviewers available
 
-# Checks if a user is in the blocked list.
-def is_blocked(user_id, data):
-    return user_id in data.get("blocked", [])
+# Builds the review buttons for a user's writeup (cached: markups are immutable).
+@lru_cache(maxsize=512)
+def review_markup(user_id):
+    return InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton("✅ Aceptar", callback_data=f"accept:{user_id}"),
+            InlineKeyboardButton("❌ Rechazar", callback_data=f"reject:{user_id}"),
+            InlineKeyboardButton("🚫 Bloquear", callback_data=f"block:{user_id}")
+        ]
+    ])
 
 # ---------- Handlers ----------
 
 # Handler for the /start command: sends a welcome message and instructions.
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
-        "👋 ¡Hola! Soy el bot de Hackiit.\n\n"
-        "Si te gustaría ser parte del grupo, envíame tu *writeup en formato PDF* para poder revisarlo. En caso de ser aceptado, te añadiré al grupo. \n\n"
-        "Para acceder a la plataforma de retos de iniciación, regístrate en: https://retos.hackiit.org\n\n",
-        parse_mode="Markdown"
-    )
+    await update.message.reply_text(START_MSG, parse_mode="Markdown")
 
 # Handler for the /userinfo command (mainly for reviewers to know their ID).
 async def userinfo(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -200,33 +314,23 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
     file = update.message.document
 
     # Avoid processing PDFs sent in the group.
+    # (Only PDFs reach this handler: the MIME type is filtered on registration.
+    # The file name is sender-controlled and only used as an upload label.)
     if chat.type != 'private':
         return
 
-    data = load_data()
+    data = get_state()
 
     # 1. Block check.
-    if is_blocked(user.id, data):
+    if user.id in data["blocked"]:
         await update.message.reply_text("❌ Estás bloqueado y no puedes enviar writeups.")
         return
 
-    # 2. Format check: Extension and MIME type
-    if not file.file_name.lower().endswith(".pdf"):
-        await update.message.reply_text("Solo se aceptan archivos PDF (extensión .pdf).")
-        return
-
-    if file.mime_type != EXPECTED_MIME_TYPE:
-        print(f"⚠️ Archivo con MIME type incorrecto: {file.mime_type} (esperado: {EXPECTED_MIME_TYPE})")
-        await update.message.reply_text(
-            "❌ El formato de archivo no es válido (MIME type incorrecto)."
-        )
-        return
-
-    # 3. Get file object for Virus Total
+    # 2. Get file object for Virus Total
     file_id = file.file_id
     telegram_file = await context.bot.get_file(file_id)
 
-    # 4. Check file with Virus Total
+    # 3. Check file with Virus Total
     await update.message.reply_text("⏳ Analizando el archivo con VirusTotal. Esto puede tardar un momento...")
 
     check = await check_virus_total(file, telegram_file) 
@@ -235,7 +339,7 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ Fichero sospechoso o la verificación de seguridad falló. Por favor, inténtalo con otro archivo.")
         return
 
-    # 5. Assigns the fixed reviewer.
+    # 4. Assigns the fixed reviewer.
     # We use the new function to get the fixed reviewer
     reviewer_id = get_user_reviewer(user.id, data) 
 
@@ -243,17 +347,15 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("No hay revisores configurados. Inténtalo más tarde.")
         return
 
-    # 6. Save pending status: registers the request before sending it.
-    # Reload data to get the fixed assignment if it was just created
-    data = load_data() 
-    data["pending"][str(user.id)] = {
+    # 5. Save pending status: registers the request before sending it.
+    data["pending"][user.id] = {
         "username": user.username,
         "file_id": file.file_id,
         "reviewer": reviewer_id
     }
-    save_data(data)
+    mark_dirty()
 
-    # 7. Forward the file to the reviewer with action buttons.
+    # 6. Forward the file to the reviewer with action buttons.
     try:
         await context.bot.send_document(
             chat_id=reviewer_id,
@@ -262,90 +364,98 @@ async def handle_document(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 f"📄 Nuevo writeup recibido de @{user.username or user.full_name}\n"
                 f"(Asignado: {user.username or user.full_name})"
             ),
-            reply_markup=InlineKeyboardMarkup([
-                [
-                    InlineKeyboardButton("✅ Aceptar", callback_data=f"accept:{user.id}"),
-                    InlineKeyboardButton("❌ Rechazar", callback_data=f"reject:{user.id}"),
-                    InlineKeyboardButton("🚫 Bloquear", callback_data=f"block:{user.id}")
-                ]
-            ])
+            reply_markup=review_markup(user.id)
         )
         await update.message.reply_text(
             "✅ Tu writeup ha sido enviado a revisión.\n\n"
             "Recibirás una respuesta cuando uno de nuestros revisores le eche un vistazo."
         )
-    except Exception as e:
+    except Exception:
         await update.message.reply_text("Error al enviar el writeup a revisión.")
-        print("Error:", e)
-
-# Handler for buttons.
-async def handle_decision(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    query = update.callback_query
-    await query.answer()
-    data = load_data()
-    decision, user_id_str = query.data.split(":")
-    user_id = int(user_id_str)
-    pending = data.get("pending", {})
-
-    # 1. Check: if the writeup is no longer pending, it is ignored.
-    if str(user_id) not in pending:
-        await query.edit_message_caption(caption="❌ Este writeup ya ha sido revisado o no existe.")
-        return
-
-    user_info = pending.pop(str(user_id))
-    save_data(data)
+        logger.exception("Error al enviar el writeup de %s a revisión", user.id)
 
-    # 2. Decision Logic: Accept.
-    if decision == "accept":
-        try:
-            group_id = int(os.getenv("GROUP_ID"))
-            invite_link_obj = await context.bot.create_chat_invite_link(
-                chat_id=group_id,
-                member_limit=1
-            )
-            invite_link = invite_link_obj.invite_link
-            await context.bot.send_message(
-                chat_id=user_id,
-                text=f"🎉 ¡Tu writeup ha sido aceptado! Ya formas parte de Hackiit. Invitación: {invite_link}"
-            )
-            await query.edit_message_caption(caption=f"✅ Writeup de @{user_info['username']} aceptado y añadido al grupo.")
+# Decision: Accept. Sends the user a single-use invite link to the group.
+async def accept_writeup(query, context, user_id, user_info):
+    try:
+        invite_link_obj = await context.bot.create_chat_invite_link(
+            chat_id=GROUP_ID,
+            member_limit=1
+        )
+        invite_link = invite_link_obj.invite_link
+        # Only report success to the reviewer once the user has the invite
+        await context.bot.send_message(
+            chat_id=user_id,
+            text=f"🎉 ¡Tu writeup ha sido aceptado! Ya formas parte de Hackiit. Invitación: {invite_link}"
+        )
+        await query.edit_message_caption(caption=f"✅ Writeup de @{user_info['username']} aceptado y añadido al grupo.")
 
-        except Exception as e:
-            await query.edit_message_caption(caption=f"⚠️ Error al añadir al usuario: {e}")
-            print(f"Error al intentar añadir usuario: {e}")
+    except Exception as e:
+        await query.edit_message_caption(caption=f"⚠️ Error al añadir al usuario: {e}")
+        logger.exception("Error al intentar añadir usuario %s", user_id)
 
-    # 3. Decision Logic: Reject.
-    elif decision == "reject":
-        await context.bot.send_message(
+# Decision: Reject.
+async def reject_writeup(query, context, user_id, user_info):
+    await asyncio.gather(
+        context.bot.send_message(
             chat_id=user_id,
             text="❌ Tu writeup ha sido rechazado, pero puedes intentarlo de nuevo cuando quieras." 
-        )
-        await query.edit_message_caption(caption=f"❌ Writeup de @{user_info['username']} rechazado.")
-
-    # 4. Decision Logic: Block.
-    elif decision == "block":
-        blocked_list = data.get("blocked", [])
-        if user_id not in blocked_list:
-            blocked_list.append(user_id)
-            data["blocked"] = blocked_list
-            save_data(data)
-        await context.bot.send_message(
+        ),
+        query.edit_message_caption(caption=f"❌ Writeup de @{user_info['username']} rechazado.")
+    )
+
+# Decision: Block. The user can't send writeups until unblocked.
+async def block_user(query, context, user_id, user_info):
+    get_state()["blocked"].add(user_id)
+    mark_dirty()
+    await asyncio.gather(
+        context.bot.send_message(
             chat_id=user_id,
             text="🚫 Has sido bloqueado y no podrás enviar writeups hasta que un administrador te desbloquee."
-        )
-        await query.edit_message_caption(
+        ),
+        query.edit_message_caption(
             caption=(
                 f"🚫 @{user_info['username']} ha sido bloqueado.\n\n"
                 f"Si en un futuro quieres desbloquearlo, usa /unblock {user_id}"
             )
         )
+    )
+
+# Maps the callback_data prefix of each review button to its action.
+DECISIONS = {
+    "accept": accept_writeup,
+    "reject": reject_writeup,
+    "block": block_user,
+}
+
+# Handler for buttons.
+async def handle_decision(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    await query.answer()
+    data = get_state()
+    decision, _, user_id_str = query.data.partition(":")
+    action = DECISIONS.get(decision)
+    if action is None:
+        return
+
+    user_id = int(user_id_str)
+
+    # 1. Check: if the writeup is no longer pending, it is ignored.
+    user_info = data["pending"].pop(user_id, None)
+    if user_info is None:
+        await query.edit_message_caption(caption="❌ Este writeup ya ha sido revisado o no existe.")
+        return
+
+    mark_dirty()
+
+    # 2. Apply the reviewer's decision.
+    await action(query, context, user_id, user_info)
 
 # Handler for the /unblock command: allows a reviewer to remove a user from the blocked list.
 async def unblock_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    data = load_data()
+    data = get_state()
     user = update.effective_user
 
-    if user.id not in data.get("reviewers", []):
+    if not is_reviewer(user.id):
         await update.message.reply_text("❌ No tienes permiso para desbloquear usuarios.")
         return
 
@@ -359,19 +469,19 @@ async def unblock_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text("❌ El user_id debe ser un número.")
         return
 
-    if target_id in data.get("blocked", []):
-        data["blocked"].remove(target_id)
-        save_data(data)
+    if target_id in data["blocked"]:
+        data["blocked"].discard(target_id)
+        mark_dirty()
         await update.message.reply_text(f"✅ Usuario {target_id} desbloqueado.")
     else:
         await update.message.reply_text("❌ El usuario no estaba bloqueado.")
 
 # Handler for the /add_reviewer command: allows adding a new reviewer.
 async def add_reviewer_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    data = load_data()
+    data = get_state()
     user = update.effective_user
 
-    if user.id not in data.get("reviewers", []):
+    if not is_reviewer(user.id):
         await update.message.reply_text("❌ No tienes permiso para añadir revisores.")
         return
 
@@ -385,19 +495,20 @@ async def add_reviewer_command(update: Update, context: ContextTypes.DEFAULT_TYP
         await update.message.reply_text("❌ El user_id debe ser un número.")
         return
 
-    if new_reviewer_id not in data.get("reviewers", []):
+    if not is_reviewer(new_reviewer_id):
         data["reviewers"].append(new_reviewer_id)
-        save_data(data)
+        refresh_reviewer_set(data)
+        mark_dirty()
         await update.message.reply_text(f"✅ Usuario {new_reviewer_id} añadido como revisor.")
     else:
         await update.message.reply_text("❌ El usuario ya es revisor.")
 
 # Handler for the /remove_reviewer command: allows removing a reviewer.
 async def remove_reviewer_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    data = load_data()
+    data = get_state()
     user = update.effective_user
 
-    if user.id not in data.get("reviewers", []):
+    if not is_reviewer(user.id):
         await update.message.reply_text("❌ No tienes permiso para eliminar revisores.")
         return
 
@@ -415,39 +526,62 @@ async def remove_reviewer_command(update: Update, context: ContextTypes.DEFAULT_
         await update.message.reply_text("❌ No puedes eliminarte a ti mismo como revisor.")
         return
 
-    if reviewer_id in data.get("reviewers", []):
+    if is_reviewer(reviewer_id):
         data["reviewers"].remove(reviewer_id)
-        # Adjust rotation index
-        if data["reviewers"]:
-            data["next_index"] = data["next_index"] % len(data["reviewers"])
-        else:
-            data["next_index"] = 0
-
-        save_data(data)
+        refresh_reviewer_set(data)
+        mark_dirty()
         await update.message.reply_text(f"✅ Usuario {reviewer_id} eliminado como revisor.")
     else:
         await update.message.reply_text("❌ El usuario no es revisor.")
 
 # Handler for the /help command.
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text(
-        "Comandos disponibles:\n"
-        "/start - iniciar\n"
-        "/userinfo - ver tu información de usuario\n"
-        "/help - ayuda\n"
-        "/unblock <user_id> - desbloquear usuario (solo revisores)\n"
-        "/add_reviewer <user_id> - añadir revisor (solo revisores)\n"
-        "/remove_reviewer <user_id> - eliminar revisor (solo revisores)"
-    )
+    await update.message.reply_text(HELP_MSG)
+
+# ---------- Lifecycle ----------
+
+# Loads the state and starts the background flusher once the application is up.
+async def post_init(app):
+    get_state()
+    app.bot_data["flusher"] = asyncio.create_task(flusher())
+
+# Stops the flusher and persists any pending changes before exiting.
+async def post_shutdown(app):
+    task = app.bot_data.get("flusher")
+    if task:
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+    await flush_state()
 
 # ---------- Main ----------
 if __name__ == "__main__":
     load_dotenv()
+    logging.basicConfig(format="%(asctime)s %(levelname)s %(name)s: %(message)s", level=logging.INFO)
+    logging.getLogger("httpx").setLevel(logging.WARNING) # Don't log every polling request
     token = os.getenv("TELEGRAM_TOKEN")
     if not token:
         raise SystemExit("Error: falta TELEGRAM_TOKEN en .env")
 
-    app = ApplicationBuilder().token(token).build()
+    try:
+        GROUP_ID = int(os.environ["GROUP_ID"])
+    except (KeyError, ValueError):
+        raise SystemExit("Error: falta GROUP_ID en .env o no es un número")
+
+    # Make sure the state directory exists before the flusher writes to it
+    os.makedirs(os.path.dirname(DATA_FILE) or ".", exist_ok=True)
+
+    # HTTP/2 and a larger connection pool let concurrent API calls share connections
+    app = (
+        ApplicationBuilder()
+        .token(token)
+        .http_version("2")
+        .get_updates_http_version("2")
+        .connection_pool_size(64)
+        .pool_timeout(5)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+        .build()
+    )
 
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("help", help_command))
@@ -455,7 +589,7 @@ if __name__ == "__main__":
     app.add_handler(CommandHandler("unblock", unblock_command))
     app.add_handler(CommandHandler("add_reviewer", add_reviewer_command))
     app.add_handler(CommandHandler("remove_reviewer", remove_reviewer_command))
-    app.add_handler(MessageHandler(filters.Document.PDF, handle_document))
+    app.add_handler(MessageHandler(filters.Document.MimeType(EXPECTED_MIME_TYPE), handle_document))
     app.add_handler(CallbackQueryHandler(handle_decision))
 
     print("Hackiit Bot is running...")